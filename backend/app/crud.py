@@ -1,10 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, defer, selectinload
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 from uuid import UUID
 
-from . import models, schemas
+from . import events, models, schemas
 from .models import Recipe, Ingredient, RecipeIngredient
+from .services import jobs, match_service
 
 
 # ---- Ingredients ----
@@ -44,11 +46,33 @@ def update_ingredient(
 
 def delete_ingredient(db: Session, ingredient_id: int):
     ingredient = get_ingredient(db, ingredient_id) 
+    recipe_ids = [ri.recipe_id for ri in ingredient.recipe_ingredients]
     db.delete(ingredient)
+    if recipe_ids:
+        db.flush()
+        match_service.on_ingredient_deleted(db, recipe_ids)
+        schedule_recipe_match_rebuild(
+            db, recipe_ids, dedupe_key=f"recipe_matches.rebuild:ingredient:{ingredient_id}"
+        )
     db.commit()
     return True
 
 
+def schedule_recipe_match_rebuild(db: Session, recipe_ids, dedupe_key: str):
+    """Queue a ``user_recipe_match`` rebuild for ``recipe_ids`` in ``db``'s transaction.
+
+    Used where a single change touches too many recipes to update inline; the
+    rows of those recipes are stale until a worker runs the job.
+    """
+    return jobs.enqueue(
+        db,
+        "recipe_matches.rebuild",
+        {"recipe_ids": sorted(str(recipe_id) for recipe_id in recipe_ids)},
+        priority=10,
+        dedupe_key=dedupe_key,
+    )
+
+
 # ---- Users ----
 def create_user(db: Session, user: schemas.UserCreate):
     existing_user = db.query(models.User).filter(models.User.email == user.email).first()
@@ -86,6 +110,8 @@ def update_user(db: Session, user_id: int, data: schemas.UserUpdate):
 def delete_user(db: Session, user_id: int):
     user = get_user(db, user_id)
     db.delete(user)
+    db.flush()
+    match_service.on_user_deleted(db, user_id)
     db.commit()
     return True
 
@@ -130,6 +156,8 @@ def add_user_ingredient(db: Session, user_id: int, ui: schemas.UserIngredientCre
         expiry_date=expiry_date
     )
     db.add(db_ui)
+    db.flush()
+    match_service.on_user_ingredient_added(db, user_id, ui.ingredient_id)
     db.commit()
     db.refresh(db_ui)
 
@@ -157,42 +185,76 @@ def get_user_ingredients(db: Session, user_id: int):
         })
     return result
 
+def update_user_ingredient_returning(
+    db: Session,
+    user_id: int,
+    ingredient_id: int,
+    values: dict
+):
+    """Apply ``values`` with a single UPDATE ... RETURNING, without committing.
+
+    Returns ``None`` when the ingredient is not in the user's fridge.
+    """
+    ingredient_name = (
+        select(models.Ingredient.name)
+        .where(models.Ingredient.id == models.UserIngredient.ingredient_id)
+        .scalar_subquery()
+    )
+    columns = (
+        models.UserIngredient.id,
+        models.UserIngredient.ingredient_id,
+        models.UserIngredient.quantity,
+        models.UserIngredient.expiry_date,
+        ingredient_name.label("ingredient_name"),
+    )
+    condition = (
+        (models.UserIngredient.user_id == user_id)
+        & (models.UserIngredient.ingredient_id == ingredient_id)
+    )
+
+    if values:
+        stmt = (
+            update(models.UserIngredient)
+            .where(condition)
+            .values(**values)
+            .returning(*columns)
+        )
+    else:
+        stmt = select(*columns).where(condition)
+
+    row = db.execute(stmt).mappings().first()
+    if row is None:
+        return None
+    if values:
+        events.record(db, "updated", "UserIngredient", {
+            "id": row["id"],
+            "user_id": user_id,
+            "ingredient_id": row["ingredient_id"],
+            "quantity": row["quantity"],
+            "expiry_date": row["expiry_date"],
+        })
+    return schemas.UserIngredientOut(**row)
+
 def update_user_ingredient(
     db: Session,
     user_id: int,
     ingredient_id: int,
     data: schemas.UserIngredientUpdate
 ):
-    ui = (
-        db.query(models.UserIngredient)
-        .filter(
-            models.UserIngredient.user_id == user_id,
-            models.UserIngredient.ingredient_id == ingredient_id
-        )
-        .first()
-    )
+    values = {}
+    if data.quantity is not None:
+        values["quantity"] = data.quantity
+    if data.expiry_date is not None:
+        values["expiry_date"] = data.expiry_date
 
-    if not ui:
+    ui_out = update_user_ingredient_returning(db, user_id, ingredient_id, values)
+    if ui_out is None:
         raise HTTPException(
             status_code=404,
             detail="Ingredient not found in user's fridge"
         )
-    if data.quantity is not None:
-        ui.quantity = data.quantity
-    if data.expiry_date is not None:
-        ui.expiry_date = data.expiry_date
 
     db.commit()
-    db.refresh(ui)
-
-    from .schemas import UserIngredientOut
-    ui_out = UserIngredientOut(
-        id=ui.id,
-        ingredient_id=ui.ingredient_id,
-        quantity=ui.quantity,
-        expiry_date=ui.expiry_date,
-        ingredient_name=ui.ingredient.name
-    )
     return ui_out
 
 def delete_user_ingredient(db: Session, user_id: int, ingredient_id: int):
@@ -212,6 +274,8 @@ def delete_user_ingredient(db: Session, user_id: int, ingredient_id: int):
         )
 
     db.delete(ui)
+    db.flush()
+    match_service.on_user_ingredient_removed(db, user_id, ingredient_id)
     db.commit()
     return {"message": "Ingredient removed from fridge"}
 
@@ -248,6 +312,8 @@ def add_ingredient_to_recipe(
     )
 
     db.add(recipe_ingredient)
+    db.flush()
+    match_service.on_recipe_ingredient_added(db, recipe_id, ingredient_id)
     db.commit()
     db.refresh(recipe_ingredient)
 
@@ -259,8 +325,18 @@ def get_recipe(db: Session, recipe_id: UUID):
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
-def get_recipes(db: Session):
-    return db.query(Recipe).all()
+def get_recipes(db: Session, fields: set[str] | None = None):
+    """All recipes; with ``fields``, columns and relations outside it are not loaded."""
+    query = db.query(Recipe)
+    if fields is None or "recipe_ingredients" in fields:
+        query = query.options(
+            selectinload(Recipe.recipe_ingredients).joinedload(RecipeIngredient.ingredient)
+        )
+    if fields is not None:
+        for column in ("description", "instructions", "external_url"):
+            if column not in fields:
+                query = query.options(defer(getattr(Recipe, column), raiseload=True))
+    return query.all()
 
 def create_recipe(db: Session, data: schemas.RecipeCreate):
     existing = db.query(Recipe).filter(Recipe.name == data.name).first()
@@ -293,6 +369,8 @@ def update_recipe(db: Session, recipe_id: UUID, data: schemas.RecipeUpdate):
 def delete_recipe(db: Session, recipe_id: UUID):
     recipe = get_recipe(db, recipe_id)
     db.delete(recipe)
+    db.flush()
+    match_service.on_recipe_deleted(db, recipe_id)
     db.commit()
     return True
 
@@ -317,5 +395,7 @@ def remove_ingredient_from_recipe(
         )
 
     db.delete(relation)
+    db.flush()
+    match_service.on_recipe_ingredient_removed(db, recipe_id, ingredient_id)
     db.commit()
     return True
@@ -0,0 +1,206 @@
+"""In-process change-event bus for fridge and catalog mutations.
+
+Changes to ``UserIngredient``, ``Recipe``, ``RecipeIngredient`` and
+``Ingredient`` rows are collected from ORM session events in ``after_flush``
+and published in ``after_commit`` with a monotonic sequence number; a
+rollback discards them. Statements that bypass the unit of work (e.g. the
+``UPDATE ... RETURNING`` fridge path) report their rows with ``record``.
+
+Subscribers are called synchronously, in sequence order, on the committing
+thread, so they must be quick; slow consumers should hand the event off to a
+queue (``stream`` does this for SSE clients).
+"""
+import asyncio
+import threading
+import uuid
+from collections import deque
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import SessionLocal
+
+
+TRACKED_MODELS = (
+    models.UserIngredient,
+    models.Recipe,
+    models.RecipeIngredient,
+    models.Ingredient,
+)
+BUFFER_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+
+_PENDING_KEY = "change_events"
+
+
+class ChangeBus:
+    def __init__(self, buffer_size: int = BUFFER_SIZE):
+        self._lock = threading.RLock()
+        # Sequence numbers restart with the process and differ between
+        # workers, so event ids carry this epoch and foreign ids are rejected.
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = []
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def subscribe(self, callback, entities=None):
+        """Call ``callback(event)`` for every committed change.
+
+        ``entities`` optionally limits delivery to the given entity names.
+        Returns a function that removes the subscription.
+        """
+        entry = (callback, set(entities) if entities else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def publish(self, changes):
+        with self._lock:
+            for op, entity, data in changes:
+                self._seq += 1
+                change = schemas.ChangeEvent(
+                    seq=self._seq, op=op, entity=entity, data=data
+                )
+                self._buffer.append(change)
+
+                for callback, entities in list(self._subscribers):
+                    if entities is not None and entity not in entities:
+                        continue
+                    try:
+                        callback(change)
+                    except Exception:
+                        pass
+
+    def event_id(self, seq: int):
+        return f"{self.epoch}.{seq}"
+
+    def parse_event_id(self, event_id: str):
+        """Sequence number of an id issued by this bus, else ``None``."""
+        epoch, _, seq = event_id.partition(".")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def replay(self, since: int):
+        """Buffered events after ``since``, or ``None`` if they cannot be replayed.
+
+        That is the case when some were dropped from the buffer, or when
+        ``since`` is ahead of this bus.
+        """
+        with self._lock:
+            if since > self._seq:
+                return None
+            if since == self._seq:
+                return []
+            if not self._buffer or self._buffer[0].seq > since + 1:
+                return None
+            return [change for change in self._buffer if change.seq > since]
+
+    def _format_sse(self, change: schemas.ChangeEvent):
+        return (
+            f"id: {self.event_id(change.seq)}\nevent: {change.op}\n"
+            f"data: {change.model_dump_json()}\n\n"
+        )
+
+    async def stream(self, since: str | None = None, predicate=None):
+        """Yield server-sent event lines for changes matching ``predicate``.
+
+        ``since`` is the id of the last event the client saw. A client whose
+        id cannot be replayed (fallen out of the buffer, or issued by another
+        process or before a restart) gets a ``reset`` event and should refetch
+        its data.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def deliver(change):
+            loop.call_soon_threadsafe(queue.put_nowait, change)
+
+        # Subscribe before replaying so nothing committed in between is lost.
+        unsubscribe = self.subscribe(deliver)
+        try:
+            if since is None:
+                last = self.last_seq
+                backlog = []
+            else:
+                last = self.parse_event_id(since)
+                backlog = None if last is None else self.replay(last)
+            if backlog is None:
+                last = self.last_seq
+                yield f"id: {self.event_id(last)}\nevent: reset\ndata: {last}\n\n"
+                backlog = []
+
+            for change in backlog:
+                last = change.seq
+                if predicate is None or predicate(change):
+                    yield self._format_sse(change)
+
+            while True:
+                try:
+                    change = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if change.seq <= last:
+                    continue
+                last = change.seq
+                if predicate is None or predicate(change):
+                    yield self._format_sse(change)
+        finally:
+            unsubscribe()
+
+
+def _row_data(obj):
+    state = inspect(obj)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+
+
+def record(db: Session, op: str, entity: str, data: dict):
+    """Queue a change made outside the unit of work for the next commit."""
+    db.info.setdefault(_PENDING_KEY, []).append((op, entity, data))
+
+
+def _after_flush(db: Session, flush_context):
+    for op, objects in (
+        ("created", db.new),
+        ("updated", db.dirty),
+        ("deleted", db.deleted),
+    ):
+        for obj in objects:
+            if not isinstance(obj, TRACKED_MODELS):
+                continue
+            if op == "updated" and not db.is_modified(obj, include_collections=False):
+                continue
+            record(db, op, type(obj).__name__, _row_data(obj))
+
+
+def _after_commit(db: Session):
+    changes = db.info.pop(_PENDING_KEY, None)
+    if changes:
+        change_bus.publish(changes)
+
+
+def _after_rollback(db: Session):
+    db.info.pop(_PENDING_KEY, None)
+
+
+change_bus = ChangeBus()
+
+event.listen(SessionLocal, "after_flush", _after_flush)
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_rollback", _after_rollback)
@@ -1,16 +1,38 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.database import Base, engine
-from app.routers import ingredients, users, user_ingredients, recipes
+from app.database import Base, SessionLocal, engine
+from app.middleware import CompressionMiddleware
+from app.services.catalog_service import ensure_catalog_version
+from app.services.jobs import start_workers, stop_workers
+from app.services.match_service import ensure_ingredient_counts, ensure_recipe_matches
+from app.services.search_service import ensure_search_schema
+from app.routers import ingredients, users, user_ingredients, recipes, events, metrics, jobs
 
 # Create database tables (for now, without Alembic migrations)
 Base.metadata.create_all(bind=engine)
+ensure_search_schema(engine)
+ensure_ingredient_counts(engine)
+with SessionLocal() as db:
+    ensure_recipe_matches(db)
+    ensure_catalog_version(db)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_workers()
+    yield
+    stop_workers()
 
-app = FastAPI(title="Fridge App Backend")
+app = FastAPI(title="Fridge App Backend", lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
 app.include_router(ingredients.router)
 app.include_router(users.router)
 app.include_router(user_ingredients.router)
 app.include_router(recipes.router)
+app.include_router(events.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
 
 # --- Root endpoint ---
 @app.get("/")
@@ -0,0 +1,179 @@
+"""Negotiated response compression.
+
+Responses sent as a single body of at least ``minimum_size`` bytes are
+compressed with brotli if the client accepts it, otherwise gzip. ``brotli``
+is listed in requirements.txt; if it is missing, only gzip is offered. The
+decision starts at ``http.response.start``: anything that is not JSON or
+text, and SSE event streams in particular, is forwarded immediately, and
+only candidates wait for their first body chunk.
+Streaming bodies are passed through untouched, since buffering them would
+hold events back. Every JSON or text response carries
+``Vary: Accept-Encoding``, compressed or not.
+
+A compressed response is a different representation, so its strong ETag gets
+an encoding suffix (``"v-gzip"``); ``app.services.catalog_service`` strips it
+again when evaluating ``If-None-Match``, and a 304 answering a suffixed tag
+carries the suffixed tag.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def _accepted_encodings(header: str):
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return {name for name, quality in accepted.items() if quality > 0}
+
+
+def choose_encoding(accept_encoding: str):
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _header(headers, name: bytes):
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _with_vary(headers):
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower() or vary.strip() == b"*":
+        return headers
+    return [
+        (key, value + b", Accept-Encoding" if key.lower() == b"vary" else value)
+        for key, value in headers
+    ]
+
+
+def _suffixed(etag: bytes, encoding: str):
+    if not etag.endswith(b'"'):
+        return etag
+    return etag[:-1] + b"-" + encoding.encode() + b'"'
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(
+            request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        if_none_match = request_headers.get(b"if-none-match", b"")
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = list(message["headers"])
+                if message["status"] == 304:
+                    headers = self._not_modified_headers(headers, encoding, if_none_match)
+                    await send({**message, "headers": headers})
+                    passthrough = True
+                    return
+                if not self._compressible(headers):
+                    passthrough = True
+                    await send(message)
+                    return
+                headers = _with_vary(headers)
+                if encoding is None or not self._may_be_large(headers):
+                    passthrough = True
+                    await send({**message, "headers": headers})
+                    return
+                # Decide on the first body chunk whether it is worth it.
+                start = {**message, "headers": headers}
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                start = None
+                await send(message)
+                return
+
+            response_headers = []
+            for name, value in start["headers"]:
+                if name.lower() == b"content-length":
+                    continue
+                if name.lower() == b"etag":
+                    value = _suffixed(value, encoding)
+                response_headers.append((name, value))
+
+            compressed = compress(body, encoding)
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+            ]
+            await send({**start, "headers": response_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers):
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+        # Event streams must reach the client as they are written.
+        if content_type.startswith("text/event-stream"):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _may_be_large(self, headers):
+        length = _header(headers, b"content-length")
+        return length is None or not length.isdigit() or int(length) >= self.minimum_size
+
+    def _not_modified_headers(self, headers, encoding, if_none_match: bytes):
+        # Echo the compressed representation's tag if that is what the
+        # client revalidated.
+        if encoding is not None:
+            etag = _header(headers, b"etag")
+            if etag is not None and _suffixed(etag, encoding) in if_none_match:
+                headers = [
+                    (name, _suffixed(value, encoding) if name.lower() == b"etag" else value)
+                    for name, value in headers
+                ]
+        return _with_vary(headers)
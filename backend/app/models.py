@@ -1,6 +1,6 @@
 from uuid import uuid4
 
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Enum, JSON, Index
 import enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -41,6 +41,7 @@ class UserIngredient(Base):
         Integer,
         ForeignKey("ingredients.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     quantity = Column(Integer, default=1, nullable=False)
@@ -100,6 +101,13 @@ class Recipe(Base):
 
     recipe_type = Column(String, nullable=False)
 
+    # Number of recipe_ingredients rows, maintained by
+    # app.services.match_service so recipes needing at most N ingredients
+    # can be found with an index range read.
+    ingredient_count = Column(
+        Integer, nullable=False, default=0, server_default="0", index=True
+    )
+
     def __repr__(self):
         return f"<Recipe id={self.id} name={self.name}>"
 
@@ -116,6 +124,7 @@ class RecipeIngredient(Base):
         Integer,
         ForeignKey("ingredients.id", ondelete="CASCADE"),
         primary_key=True,
+        index=True,
     )
 
     amount = Column(String, nullable=True)
@@ -133,3 +142,77 @@ class RecipeIngredient(Base):
             f"<RecipeIngredient recipe_id={self.recipe_id} "
             f"ingredient_id={self.ingredient_id} amount={self.amount}>"
         )
+
+
+# USER RECIPE MATCHES
+
+# How many of a recipe's ingredients a user is missing. Only pairs where the
+# user owns at least one of the recipe's ingredients have a row; maintained
+# incrementally by app.services.match_service.
+class UserRecipeMatch(Base):
+    __tablename__ = "user_recipe_match"
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    recipe_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("recipes.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    missing_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_recipe_match_user_missing", "user_id", "missing_count"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<UserRecipeMatch user_id={self.user_id} "
+            f"recipe_id={self.recipe_id} missing_count={self.missing_count}>"
+        )
+
+
+# BACKGROUND JOBS
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    dedupe_key = Column(String, nullable=True, index=True)
+
+    # Higher priority runs first.
+    priority = Column(Integer, default=0, nullable=False)
+    status = Column(String, default="queued", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    run_after = Column(DateTime, nullable=False)
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "priority", "run_after"),
+    )
+
+    def __repr__(self):
+        return f"<Job id={self.id} kind={self.kind} status={self.status}>"
+
+
+# Single-row counter bumped in the same transaction as every catalog change
+# (see app.services.catalog_service), so all workers agree on catalog ETags.
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogVersion version={self.version}>"
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.events import change_bus
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"],
+)
+
+@router.get("/")
+def stream_events(
+    entities: list[str] | None = Query(None),
+    since: str | None = None,
+    last_event_id: str | None = Header(None),
+):
+    if since is None:
+        since = last_event_id
+    wanted = set(entities) if entities else None
+
+    return StreamingResponse(
+        change_bus.stream(
+            since=since,
+            predicate=lambda change: wanted is None or change.entity in wanted,
+        ),
+        media_type="text/event-stream",
+    )
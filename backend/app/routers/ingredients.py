@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app import crud, schemas
+from app.services.catalog_service import cache_headers, catalog_etag, not_modified
 
 router = APIRouter(
     prefix="/ingredients",
@@ -17,8 +19,17 @@ def create_ingredient_endpoint(
     return crud.create_ingredient(db, ingredient)
 
 @router.get("/", response_model=list[schemas.IngredientOut])
-def list_ingredients(db: Session = Depends(get_db)):
-    return crud.get_ingredients(db)
+def list_ingredients(request: Request, db: Session = Depends(get_db)):
+    etag = catalog_etag(db, "ingredients")
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    content = [
+        schemas.IngredientOut.model_validate(ingredient).model_dump(mode="json")
+        for ingredient in crud.get_ingredients(db)
+    ]
+    return JSONResponse(content, headers=cache_headers(etag))
 
 @router.get("/{ingredient_id}", response_model=schemas.IngredientOut)
 def get_ingredient_endpoint(
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app import schemas
+from app.services import jobs
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"],
+)
+
+@router.post("/", response_model=schemas.JobOut, status_code=202)
+def enqueue_job(data: schemas.JobCreate, db: Session = Depends(get_db)):
+    if not jobs.is_registered(data.kind):
+        raise HTTPException(status_code=400, detail="Unknown job kind")
+
+    job = jobs.enqueue(
+        db,
+        data.kind,
+        data.payload,
+        priority=data.priority,
+        dedupe_key=data.dedupe_key,
+        max_attempts=data.max_attempts,
+    )
+    db.commit()
+    db.refresh(job)
+    return job
+
+@router.get("/", response_model=list[schemas.JobOut])
+def list_jobs(
+    status: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    return jobs.get_jobs(db, status, limit)
+
+@router.get("/{job_id}", response_model=schemas.JobOut)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = jobs.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from app.services.rate_limit import rate_limiter
+from app.services.recipe_service import suggest_flight
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+)
+
+@router.get("/")
+def get_metrics():
+    return {
+        "coalescing": {"recipes.suggest": suggest_flight.stats()},
+        "rate_limit": rate_limiter.stats(),
+    }
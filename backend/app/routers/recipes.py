@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.database import get_db
-from app.services.recipe_service import suggest_recipes_for_user
+from app.services.catalog_service import cache_headers, catalog_etag, not_modified
+from app.services.rate_limit import rate_limiter
+from app.services.recipe_service import makeable_recipe_ids, suggest_recipes_coalesced
+from app.services.search_service import search_recipe_ids
+from app.services.similarity_service import similar_recipes
 from app import crud, schemas, models
 
 router = APIRouter(
@@ -11,9 +16,44 @@ router = APIRouter(
     tags=["Recipes"],
 )
 
-@router.get("/suggest")
-def suggest_recipes(user_id: int, db: Session = Depends(get_db)):
-    return suggest_recipes_for_user(db, user_id)
+# Burst of 10 suggestion requests per user, refilled at one every 2 seconds.
+@router.get(
+    "/suggest",
+    dependencies=[Depends(rate_limiter.limit("recipes.suggest", rate=0.5, capacity=10))],
+)
+def suggest_recipes(
+    user_id: int,
+    max_missing: int | None = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    return suggest_recipes_coalesced(db, user_id, max_missing)
+
+@router.get("/search", response_model=list[schemas.RecipeOut])
+def search_recipes(
+    q: str = Query(..., min_length=1),
+    user_id: int | None = None,
+    can_make: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Ranked full-text search; ``can_make`` keeps only recipes ``user_id`` can make now."""
+    if not can_make:
+        ids = search_recipe_ids(db, q, limit)
+    else:
+        if user_id is None:
+            raise HTTPException(status_code=400, detail="can_make requires user_id")
+        crud.get_user(db, user_id)
+        makeable = makeable_recipe_ids(db, user_id)
+        ids = [
+            recipe_id for recipe_id in search_recipe_ids(db, q)
+            if recipe_id in makeable
+        ][:limit]
+
+    recipes = {
+        recipe.id: recipe
+        for recipe in db.query(models.Recipe).filter(models.Recipe.id.in_(ids))
+    }
+    return [recipes[recipe_id] for recipe_id in ids if recipe_id in recipes]
 
 @router.post("/", response_model=schemas.RecipeOut)
 def create_recipe(
@@ -24,8 +64,36 @@ def create_recipe(
 
 
 @router.get("/", response_model=list[schemas.RecipeOut])
-def list_recipes(db: Session = Depends(get_db)):
-    return crud.get_recipes(db)
+def list_recipes(
+    request: Request,
+    fields: str | None = Query(
+        None, description="Comma-separated RecipeOut fields to include, e.g. id,name"
+    ),
+    db: Session = Depends(get_db),
+):
+    selected = None
+    if fields:
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = selected - schemas.RecipeOut.model_fields.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+
+    # Checked before loading the catalog: an unchanged catalog costs at most a
+    # primary-key read of catalog_version (none while the version is cached).
+    etag = catalog_etag(db, "recipes", sorted(selected) if selected else None)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    out = schemas.recipe_out_subset(frozenset(selected)) if selected else schemas.RecipeOut
+    content = [
+        out.model_validate(recipe).model_dump(mode="json")
+        for recipe in crud.get_recipes(db, selected)
+    ]
+    return JSONResponse(content, headers=cache_headers(etag))
 
 
 @router.get("/{recipe_id}", response_model=schemas.RecipeOut)
@@ -33,6 +101,15 @@ def get_recipe(recipe_id: UUID, db: Session = Depends(get_db)):
     return crud.get_recipe(db, recipe_id)
 
 
+@router.get("/{recipe_id}/similar", response_model=list[schemas.SimilarRecipeOut])
+def get_similar_recipes(
+    recipe_id: UUID,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    return similar_recipes(db, recipe_id, limit)
+
+
 @router.put("/{recipe_id}", response_model=schemas.RecipeOut)
 def update_recipe(
     recipe_id: UUID,
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app import crud, schemas
+from app.events import change_bus
+from app.services.write_coalescer import WRITE_COALESCING, write_coalescer
 
 router = APIRouter(
     prefix="/users/{user_id}/ingredients",
@@ -24,6 +27,27 @@ def get_user_ingredients(
 ):
     return crud.get_user_ingredients(db, user_id)
 
+@router.get("/events")
+def stream_user_ingredient_events(
+    user_id: int,
+    since: str | None = None,
+    last_event_id: str | None = Header(None),
+):
+    """Server-sent events for changes to this user's fridge."""
+    if since is None:
+        since = last_event_id
+
+    return StreamingResponse(
+        change_bus.stream(
+            since=since,
+            predicate=lambda change: (
+                change.entity == "UserIngredient"
+                and change.data.get("user_id") == user_id
+            ),
+        ),
+        media_type="text/event-stream",
+    )
+
 @router.put("/{ingredient_id}", response_model=schemas.UserIngredientOut)
 def update_user_ingredient(
     user_id: int,
@@ -31,6 +55,8 @@ def update_user_ingredient(
     data: schemas.UserIngredientUpdate,
     db: Session = Depends(get_db),
 ):
+    if WRITE_COALESCING:
+        return write_coalescer.update_user_ingredient(user_id, ingredient_id, data)
     return crud.update_user_ingredient(db, user_id, ingredient_id, data)
 
 @router.delete("/{ingredient_id}", status_code=204)
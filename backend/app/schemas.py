@@ -1,6 +1,8 @@
-from pydantic import BaseModel, model_validator
-from datetime import date
-from typing import List, Optional, Literal
+from functools import lru_cache
+
+from pydantic import BaseModel, ConfigDict, Field, create_model, model_validator
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Literal
 from uuid import UUID
 
 
@@ -114,6 +116,8 @@ class RecipeIngredientOut(BaseModel):
     ingredient_name: str
     amount: Optional[str] = None
 
+    model_config = {"from_attributes": True}
+
 
 class RecipeOut(BaseModel):
     id: UUID
@@ -126,3 +130,58 @@ class RecipeOut(BaseModel):
 
     model_config = {"from_attributes": True}
 
+
+@lru_cache(maxsize=64)
+def recipe_out_subset(fields: frozenset):
+    """``RecipeOut`` restricted to ``fields``, for sparse fieldset responses."""
+    return create_model(
+        "RecipeOutSubset",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (field.annotation, ...)
+            for name, field in RecipeOut.model_fields.items()
+            if name in fields
+        },
+    )
+
+
+class SimilarRecipeOut(BaseModel):
+    id: UUID
+    name: str
+    similarity: float
+
+
+# CHANGE EVENTS
+
+class ChangeEvent(BaseModel):
+    seq: int
+    op: Literal["created", "updated", "deleted"]
+    entity: Literal["UserIngredient", "Recipe", "RecipeIngredient", "Ingredient"]
+    data: Dict[str, Any]
+
+
+# BACKGROUND JOBS
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+    priority: int = 0
+    dedupe_key: Optional[str] = None
+    max_attempts: int = Field(3, ge=1)
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    dedupe_key: Optional[str]
+    priority: int
+    status: Literal["queued", "running", "succeeded", "failed"]
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str]
+    run_after: datetime
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,131 @@
+"""Catalog versioning for conditional GETs on ``/recipes/`` and ``/ingredients/``.
+
+The catalog version is a single-row counter in ``catalog_version``, bumped
+from ``after_flush`` whenever a flush touches ``Recipe``, ``RecipeIngredient``
+or ``Ingredient``, so it commits or rolls back with the change itself and is
+shared by every worker. A strong ETag is computed from it, and a matching
+``If-None-Match`` is answered with 304 without loading the catalog.
+
+Reads are cached for ``CATALOG_VERSION_TTL_SECONDS``. This process's own
+commits drop the cache through the change-event bus; changes committed by
+other workers are picked up once the cached value expires.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import SessionLocal
+from app.events import change_bus
+
+
+CATALOG_VERSION_TTL_SECONDS = float(os.getenv("CATALOG_VERSION_TTL_SECONDS", "1.0"))
+CATALOG_MODELS = (models.Recipe, models.RecipeIngredient, models.Ingredient)
+CATALOG_ENTITIES = tuple(model.__name__ for model in CATALOG_MODELS)
+
+_ROW_ID = 1
+
+_lock = threading.Lock()
+_cached_version = None
+_cached_until = 0.0
+_generation = 0
+
+
+def _bump_version(db: Session, flush_context):
+    if not any(
+        isinstance(obj, CATALOG_MODELS)
+        for obj in (*db.new, *db.dirty, *db.deleted)
+    ):
+        return
+    connection = db.connection()
+    bumped = connection.execute(
+        update(models.CatalogVersion)
+        .where(models.CatalogVersion.id == _ROW_ID)
+        .values(version=models.CatalogVersion.version + 1)
+    )
+    if bumped.rowcount == 0:
+        connection.execute(
+            insert(models.CatalogVersion).values(id=_ROW_ID, version=1)
+        )
+
+
+event.listen(SessionLocal, "after_flush", _bump_version)
+
+
+def _on_change(change: schemas.ChangeEvent):
+    global _cached_until, _generation
+    with _lock:
+        _cached_until = 0.0
+        _generation += 1
+
+
+change_bus.subscribe(_on_change, entities=CATALOG_ENTITIES)
+
+
+def ensure_catalog_version(db: Session):
+    """Create the counter row if it does not exist yet."""
+    if db.get(models.CatalogVersion, _ROW_ID) is None:
+        db.add(models.CatalogVersion(id=_ROW_ID, version=0))
+        db.commit()
+
+
+def catalog_version(db: Session):
+    global _cached_version, _cached_until
+    now = time.monotonic()
+    with _lock:
+        if now < _cached_until:
+            return _cached_version
+        generation = _generation
+
+    version = db.scalar(
+        select(models.CatalogVersion.version).where(models.CatalogVersion.id == _ROW_ID)
+    ) or 0
+    with _lock:
+        # A commit seen while reading may not be in ``version``; don't cache it.
+        if generation == _generation:
+            _cached_version = version
+            _cached_until = now + CATALOG_VERSION_TTL_SECONDS
+    return version
+
+
+def catalog_etag(db: Session, *variant):
+    """Strong ETag for the current catalog version and response ``variant``."""
+    tag = str(catalog_version(db))
+    if variant:
+        digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:12]
+        tag = f"{tag}.{digest}"
+    return f'"{tag}"'
+
+
+def _matches(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Compressed representations carry an encoding suffix; see
+        # app.middleware.
+        for suffix in ('-gzip"', '-br"'):
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str):
+    """A 304 response if the client already has ``etag``, else ``None``."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+
+def cache_headers(etag: str):
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -0,0 +1,245 @@
+"""Background jobs backed by the ``jobs`` table and a local worker pool.
+
+Handlers are registered with ``@handler("kind")`` and receive a fresh
+session and the job payload. ``enqueue`` only adds the job to the caller's
+session, so a job scheduled by a ``crud`` mutation is committed (or rolled
+back) together with it.
+
+Scheduling rules:
+
+* higher ``priority`` runs first, then oldest first;
+* a ``dedupe_key`` matching a job that is still queued returns that job
+  instead of adding another (jobs already running are not merged, so a change
+  made while one runs still gets its own run);
+* a failing job is retried with exponential backoff until ``max_attempts``;
+* a worker holds a job for ``JOB_LEASE_SECONDS``; if it dies, the job becomes
+  claimable again once the lease expires, so handlers must be idempotent. A
+  lease expiring on the last allowed attempt fails the job instead.
+
+``JOB_WORKERS`` (default 2) sets the pool size; ``0`` disables the workers in
+this process (jobs still get queued).
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+_wake = threading.Event()
+_stop = threading.Event()
+_claim_lock = threading.Lock()
+_workers = []
+
+
+def handler(kind: str):
+    """Register the decorated ``fn(db, payload)`` as the handler for ``kind``."""
+
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+
+    return register
+
+
+def is_registered(kind: str):
+    return kind in _handlers
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict | None = None,
+    priority: int = 0,
+    dedupe_key: str | None = None,
+    max_attempts: int = 3,
+):
+    """Add a job to ``db``; it becomes visible to workers when ``db`` commits."""
+    if dedupe_key is not None:
+        for pending in db.new:
+            if isinstance(pending, models.Job) and pending.dedupe_key == dedupe_key:
+                return pending
+        existing = (
+            db.query(models.Job)
+            .filter(
+                models.Job.dedupe_key == dedupe_key,
+                models.Job.status == "queued",
+            )
+            .first()
+        )
+        if existing:
+            if priority > existing.priority:
+                existing.priority = priority
+            return existing
+
+    now = _now()
+    job = models.Job(
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        dedupe_key=dedupe_key,
+        max_attempts=max_attempts,
+        status="queued",
+        attempts=0,
+        run_after=now,
+        created_at=now,
+    )
+    db.add(job)
+    db.info["jobs_enqueued"] = True
+    return job
+
+
+def get_job(db: Session, job_id: int):
+    return db.query(models.Job).filter(models.Job.id == job_id).first()
+
+
+def get_jobs(db: Session, status: str | None = None, limit: int = 100):
+    query = db.query(models.Job)
+    if status is not None:
+        query = query.filter(models.Job.status == status)
+    return query.order_by(models.Job.id.desc()).limit(limit).all()
+
+
+def _fail_expired(db: Session, now: datetime):
+    # A job whose lease ran out on its last attempt most likely kills or hangs
+    # its worker; retrying it forever would take the pool down with it.
+    db.query(models.Job).filter(
+        models.Job.status == "running",
+        models.Job.locked_until < now,
+        models.Job.attempts >= models.Job.max_attempts,
+    ).update(
+        {
+            models.Job.status: "failed",
+            models.Job.locked_until: None,
+            models.Job.last_error: "Lease expired on the final attempt",
+            models.Job.finished_at: now,
+        },
+        synchronize_session=False,
+    )
+
+
+def _claim(db: Session):
+    now = _now()
+    _fail_expired(db, now)
+    query = (
+        db.query(models.Job)
+        .filter(
+            or_(
+                (models.Job.status == "queued") & (models.Job.run_after <= now),
+                (models.Job.status == "running")
+                & (models.Job.locked_until < now)
+                & (models.Job.attempts < models.Job.max_attempts),
+            )
+        )
+        .order_by(models.Job.priority.desc(), models.Job.id)
+    )
+    if db.bind.dialect.name == "postgresql":
+        job = query.with_for_update(skip_locked=True).first()
+    else:
+        job = query.first()
+    if job is None:
+        db.commit()
+        return None
+
+    job.status = "running"
+    job.attempts += 1
+    job.locked_until = now + timedelta(seconds=JOB_LEASE_SECONDS)
+    db.commit()
+    return job.id, job.kind, job.payload
+
+
+def run_next():
+    """Claim and run one job; return ``False`` if none was ready."""
+    db = SessionLocal()
+    try:
+        # SQLite has no SKIP LOCKED; serialise claims inside this process.
+        with _claim_lock:
+            claimed = _claim(db)
+        if claimed is None:
+            return False
+        job_id, kind, payload = claimed
+
+        error = None
+        try:
+            fn = _handlers.get(kind)
+            if fn is None:
+                raise LookupError(f"No handler registered for job kind {kind!r}")
+            work = SessionLocal()
+            try:
+                fn(work, payload)
+            finally:
+                work.close()
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            error = exc
+
+        job = get_job(db, job_id)
+        job.locked_until = None
+        if error is None:
+            job.status = "succeeded"
+            job.last_error = None
+            job.finished_at = _now()
+        elif job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.last_error = repr(error)
+            job.run_after = _now() + timedelta(seconds=2 ** job.attempts)
+        else:
+            job.status = "failed"
+            job.last_error = repr(error)
+            job.finished_at = _now()
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def _work():
+    while not _stop.is_set():
+        try:
+            ran = run_next()
+        except Exception:
+            logger.exception("Job worker error")
+            ran = False
+        if not ran:
+            _wake.wait(JOB_POLL_SECONDS)
+            _wake.clear()
+
+
+def start_workers(count: int = JOB_WORKERS):
+    _stop.clear()
+    for number in range(count - len(_workers)):
+        worker = threading.Thread(
+            target=_work, name=f"job-worker-{number}", daemon=True
+        )
+        worker.start()
+        _workers.append(worker)
+
+
+def stop_workers():
+    _stop.set()
+    _wake.set()
+    for worker in _workers:
+        worker.join()
+    _workers.clear()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _after_commit(db: Session):
+    if db.info.pop("jobs_enqueued", False):
+        _wake.set()
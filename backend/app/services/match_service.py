@@ -0,0 +1,346 @@
+"""Incremental maintenance of the ``user_recipe_match`` table.
+
+A row ``(user_id, recipe_id, missing_count)`` exists while the user owns at
+least one of the recipe's ingredients; ``missing_count`` is how many of the
+recipe's ingredients they do not own. Recipes the user shares no ingredient
+with have no row, which keeps the table proportional to actual overlaps
+instead of users x recipes.
+
+Every change is a set-based statement scoped to a single ingredient:
+
+* a fridge item added/removed touches only the user's rows for recipes
+  containing that ingredient;
+* an ingredient added to/removed from a recipe touches only that recipe's
+  rows, inserting or deleting rows for the users owning the ingredient, and
+  recounts its ``Recipe.ingredient_count``;
+* deleting an ingredient recounts its recipes at once but leaves their rows
+  to a ``recipe_matches.rebuild`` job (see ``crud.delete_ingredient``).
+
+Rows are created with ``INSERT ... ON CONFLICT`` and each change first locks
+the ingredient and recipe rows it depends on, so concurrent changes under
+READ COMMITTED neither collide on the primary key nor miss each other's
+effect on a count.
+
+The ``on_*`` functions run inside the caller's transaction and must be
+called after the triggering row has been flushed. ``verify_recipe_matches``
+compares the table with a full recompute and ``rebuild_recipe_matches``
+restores it.
+"""
+from sqlalchemy import delete, func, insert, inspect, literal, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    UserIngredient,
+    UserRecipeMatch,
+)
+
+
+def _execute(db: Session, statement):
+    # No UserRecipeMatch objects are kept in sessions, so skip synchronising.
+    return db.execute(statement, execution_options={"synchronize_session": False})
+
+
+def _recipe_size(recipe_id):
+    sized = aliased(RecipeIngredient)
+    return (
+        select(func.count())
+        .where(sized.recipe_id == recipe_id)
+        .scalar_subquery()
+    )
+
+
+def _recipes_with(ingredient_id: int):
+    return select(RecipeIngredient.recipe_id).where(
+        RecipeIngredient.ingredient_id == ingredient_id
+    )
+
+
+def _owners_of(ingredient_id: int):
+    return select(UserIngredient.user_id).where(
+        UserIngredient.ingredient_id == ingredient_id
+    )
+
+
+def _insert(db: Session):
+    # INSERT ... ON CONFLICT, in the dialect's own spelling.
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(UserRecipeMatch)
+    return sqlite.insert(UserRecipeMatch)
+
+
+def _lock(db: Session, ingredient_id: int, recipe_ids):
+    # Row locks that serialise every change able to move the same counts: two
+    # changes to one recipe, a fridge change against a recipe change of the
+    # same ingredient (each would otherwise miss the other's uncommitted row)
+    # and a fridge change against any change to the size of a recipe it
+    # touches. NO KEY UPDATE does not conflict with the KEY SHARE locks the
+    # caller's just-flushed foreign keys hold. Ingredient first, then recipes
+    # by id, so lock order is the same in every transaction. A no-op on SQLite,
+    # which serialises writers anyway.
+    db.execute(
+        select(Ingredient.id)
+        .where(Ingredient.id == ingredient_id)
+        .with_for_update(key_share=True)
+    )
+    _lock_recipes(db, recipe_ids)
+
+
+def _lock_recipes(db: Session, recipe_ids):
+    db.execute(
+        select(Recipe.id)
+        .where(Recipe.id.in_(recipe_ids))
+        .order_by(Recipe.id)
+        .with_for_update(key_share=True)
+    )
+
+
+def _refresh_ingredient_counts(db: Session, recipe_ids):
+    _execute(
+        db,
+        update(Recipe)
+        .where(Recipe.id.in_(recipe_ids))
+        .values(ingredient_count=_recipe_size(Recipe.id))
+    )
+
+
+def on_user_ingredient_added(db: Session, user_id: int, ingredient_id: int):
+    _lock(db, ingredient_id, _recipes_with(ingredient_id))
+    statement = _insert(db).from_select(
+        ["user_id", "recipe_id", "missing_count"],
+        select(
+            literal(user_id),
+            RecipeIngredient.recipe_id,
+            _recipe_size(RecipeIngredient.recipe_id) - 1,
+        ).where(RecipeIngredient.ingredient_id == ingredient_id),
+    )
+    _execute(
+        db,
+        statement.on_conflict_do_update(
+            index_elements=["user_id", "recipe_id"],
+            set_={"missing_count": UserRecipeMatch.missing_count - 1},
+        )
+    )
+
+
+def on_user_ingredient_removed(db: Session, user_id: int, ingredient_id: int):
+    _lock(db, ingredient_id, _recipes_with(ingredient_id))
+    _execute(
+        db,
+        update(UserRecipeMatch)
+        .where(
+            UserRecipeMatch.user_id == user_id,
+            UserRecipeMatch.recipe_id.in_(_recipes_with(ingredient_id)),
+        )
+        .values(missing_count=UserRecipeMatch.missing_count + 1)
+    )
+    _execute(
+        db,
+        delete(UserRecipeMatch).where(
+            UserRecipeMatch.user_id == user_id,
+            UserRecipeMatch.recipe_id.in_(_recipes_with(ingredient_id)),
+            UserRecipeMatch.missing_count >= _recipe_size(UserRecipeMatch.recipe_id),
+        )
+    )
+
+
+def on_recipe_ingredient_added(db: Session, recipe_id, ingredient_id: int):
+    _lock(db, ingredient_id, [recipe_id])
+    _refresh_ingredient_counts(db, [recipe_id])
+    # Owners of the ingredient keep their count (one more needed, one more
+    # owned); everyone else with a row now misses one more.
+    _execute(
+        db,
+        update(UserRecipeMatch)
+        .where(
+            UserRecipeMatch.recipe_id == recipe_id,
+            UserRecipeMatch.user_id.not_in(_owners_of(ingredient_id)),
+        )
+        .values(missing_count=UserRecipeMatch.missing_count + 1)
+    )
+    statement = _insert(db).from_select(
+        ["user_id", "recipe_id", "missing_count"],
+        select(
+            UserIngredient.user_id,
+            literal(recipe_id, UserRecipeMatch.recipe_id.type),
+            _recipe_size(recipe_id) - 1,
+        )
+        .where(UserIngredient.ingredient_id == ingredient_id)
+        .distinct(),
+    )
+    _execute(
+        db,
+        statement.on_conflict_do_nothing(index_elements=["user_id", "recipe_id"])
+    )
+
+
+def on_recipe_ingredient_removed(db: Session, recipe_id, ingredient_id: int):
+    _lock(db, ingredient_id, [recipe_id])
+    _refresh_ingredient_counts(db, [recipe_id])
+    _execute(
+        db,
+        update(UserRecipeMatch)
+        .where(
+            UserRecipeMatch.recipe_id == recipe_id,
+            UserRecipeMatch.user_id.not_in(_owners_of(ingredient_id)),
+        )
+        .values(missing_count=UserRecipeMatch.missing_count - 1)
+    )
+    # Owners whose only shared ingredient this was no longer match at all.
+    _execute(
+        db,
+        delete(UserRecipeMatch).where(
+            UserRecipeMatch.recipe_id == recipe_id,
+            UserRecipeMatch.user_id.in_(_owners_of(ingredient_id)),
+            UserRecipeMatch.missing_count >= _recipe_size(recipe_id),
+        )
+    )
+
+
+def on_ingredient_deleted(db: Session, recipe_ids):
+    """Fix the sizes of the ingredient's recipes; their rows need a rebuild."""
+    _lock_recipes(db, recipe_ids)
+    _refresh_ingredient_counts(db, recipe_ids)
+
+
+def on_recipe_deleted(db: Session, recipe_id):
+    _execute(db, delete(UserRecipeMatch).where(UserRecipeMatch.recipe_id == recipe_id))
+
+
+def on_user_deleted(db: Session, user_id: int):
+    _execute(db, delete(UserRecipeMatch).where(UserRecipeMatch.user_id == user_id))
+
+
+def missing_counts(db: Session, user_id: int, max_missing: int | None = None):
+    """``(recipe_id, missing_count)`` for every recipe, fewest missing first.
+
+    Rows of the table are read directly; recipes without a row share no
+    ingredient with the fridge and miss all of theirs, i.e. their
+    ``ingredient_count``. With ``max_missing`` both are index range reads.
+    """
+    matched = select(UserRecipeMatch.recipe_id, UserRecipeMatch.missing_count).where(
+        UserRecipeMatch.user_id == user_id
+    )
+    unmatched = select(Recipe.id, Recipe.ingredient_count).where(
+        ~select(UserRecipeMatch.recipe_id)
+        .where(
+            UserRecipeMatch.user_id == user_id,
+            UserRecipeMatch.recipe_id == Recipe.id,
+        )
+        .exists()
+    )
+    if max_missing is not None:
+        matched = matched.where(UserRecipeMatch.missing_count <= max_missing)
+        unmatched = unmatched.where(Recipe.ingredient_count <= max_missing)
+
+    counts = [tuple(row) for row in db.execute(unmatched)]
+    counts += [tuple(row) for row in db.execute(matched)]
+    return sorted(counts, key=lambda pair: pair[1])
+
+
+def _expected_matches(user_id: int | None = None, recipe_ids=None):
+    query = (
+        select(
+            UserIngredient.user_id,
+            RecipeIngredient.recipe_id,
+            (
+                _recipe_size(RecipeIngredient.recipe_id)
+                - func.count(func.distinct(RecipeIngredient.ingredient_id))
+            ).label("missing_count"),
+        )
+        .join(
+            RecipeIngredient,
+            RecipeIngredient.ingredient_id == UserIngredient.ingredient_id,
+        )
+        .group_by(UserIngredient.user_id, RecipeIngredient.recipe_id)
+    )
+    if user_id is not None:
+        query = query.where(UserIngredient.user_id == user_id)
+    if recipe_ids is not None:
+        query = query.where(RecipeIngredient.recipe_id.in_(recipe_ids))
+    return query
+
+
+def _scope(statement, user_id: int | None, recipe_ids):
+    if user_id is not None:
+        statement = statement.where(UserRecipeMatch.user_id == user_id)
+    if recipe_ids is not None:
+        statement = statement.where(UserRecipeMatch.recipe_id.in_(recipe_ids))
+    return statement
+
+
+def rebuild_recipe_matches(db: Session, user_id: int | None = None, recipe_ids=None):
+    """Recompute rows for a user and/or recipes (everything by default)."""
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        _lock_recipes(db, recipe_ids)
+        _refresh_ingredient_counts(db, recipe_ids)
+    elif user_id is None:
+        _execute(db, update(Recipe).values(ingredient_count=_recipe_size(Recipe.id)))
+    _execute(db, _scope(delete(UserRecipeMatch), user_id, recipe_ids))
+    _execute(
+        db,
+        insert(UserRecipeMatch).from_select(
+            ["user_id", "recipe_id", "missing_count"],
+            _expected_matches(user_id, recipe_ids),
+        )
+    )
+
+
+def verify_recipe_matches(db: Session, user_id: int | None = None):
+    """Differences between the table and a full recompute, as dicts."""
+    expected = {
+        (row.user_id, row.recipe_id): row.missing_count
+        for row in db.execute(_expected_matches(user_id))
+    }
+    actual = {
+        (row.user_id, row.recipe_id): row.missing_count
+        for row in db.execute(
+            _scope(
+                select(
+                    UserRecipeMatch.user_id,
+                    UserRecipeMatch.recipe_id,
+                    UserRecipeMatch.missing_count,
+                ),
+                user_id,
+                None,
+            )
+        )
+    }
+    return [
+        {
+            "user_id": key[0],
+            "recipe_id": key[1],
+            "expected": expected.get(key),
+            "actual": actual.get(key),
+        }
+        for key in expected.keys() | actual.keys()
+        if expected.get(key) != actual.get(key)
+    ]
+
+
+def ensure_ingredient_counts(engine):
+    """Add and backfill ``recipes.ingredient_count`` on databases created before it."""
+    if "ingredient_count" in {
+        column["name"] for column in inspect(engine).get_columns("recipes")
+    }:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE recipes ADD COLUMN ingredient_count INTEGER NOT NULL DEFAULT 0"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_recipes_ingredient_count "
+            "ON recipes (ingredient_count)"
+        ))
+        conn.execute(update(Recipe).values(ingredient_count=_recipe_size(Recipe.id)))
+
+
+def ensure_recipe_matches(db: Session):
+    """Populate the table once for databases created before it existed."""
+    if db.query(UserRecipeMatch).first() is None and db.query(UserIngredient).first():
+        rebuild_recipe_matches(db)
+        db.commit()
@@ -0,0 +1,147 @@
+"""Per-user, per-route token-bucket rate limiting.
+
+Backends:
+
+``memory``
+    Buckets live in this process. Fine for a single worker.
+``redis``
+    Buckets live in a Redis-compatible server (Redis, Valkey, KeyDB, ...) at
+    ``RATE_LIMIT_REDIS_URL``, so all workers share them. Needs the ``redis``
+    package. Tests run the same Lua script against ``fakeredis``.
+
+Select one with ``RATE_LIMIT_BACKEND`` (default ``memory``).
+"""
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryBackend:
+    # Buckets that have refilled completely carry no state and are dropped
+    # once the table grows past this size.
+    MAX_BUCKETS = 10_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key: str, rate: float, capacity: int):
+        """Take one token; return ``(allowed, seconds until next token)``."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._prune(now)
+
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def _prune(self, now: float):
+        for key, (_, _, full_at) in list(self._buckets.items()):
+            if full_at <= now:
+                del self._buckets[key]
+
+
+class RedisBackend:
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[2])
+    local rate = tonumber(ARGV[1])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(
+        self,
+        url: str = RATE_LIMIT_REDIS_URL,
+        prefix: str = "ratelimit:",
+        client=None,
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise RuntimeError(
+                    "RATE_LIMIT_BACKEND=redis requires the 'redis' package"
+                ) from exc
+            client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._client = client
+        self._take = self._client.register_script(self._SCRIPT)
+
+    def take(self, key: str, rate: float, capacity: int):
+        allowed, tokens = self._take(
+            keys=[self.prefix + key], args=[rate, capacity, time.time()]
+        )
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate
+
+
+def _create_backend():
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend()
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend()
+    raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+
+
+class RateLimiter:
+    def __init__(self, backend=None):
+        self.backend = backend or _create_backend()
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def check(self, route: str, user_id, rate: float, capacity: int):
+        allowed, retry_after = self.backend.take(f"{route}:{user_id}", rate, capacity)
+
+        with self._lock:
+            counts = self._counts.setdefault(route, {"allowed": 0, "throttled": 0})
+            counts["allowed" if allowed else "throttled"] += 1
+
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def limit(self, route: str, rate: float, capacity: int):
+        """FastAPI dependency limiting ``route`` per ``user_id`` parameter.
+
+        ``user_id`` is validated by FastAPI first, so buckets are keyed by the
+        canonical id and malformed requests never take a token.
+        """
+
+        def dependency(user_id: int):
+            self.check(route, user_id, rate, capacity)
+
+        return dependency
+
+    def stats(self):
+        with self._lock:
+            return {route: dict(counts) for route, counts in self._counts.items()}
+
+
+rate_limiter = RateLimiter()
@@ -1,34 +1,91 @@
-from sqlalchemy.orm import Session
+from uuid import UUID
+
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
-from app.models import User, Recipe
+from app.models import User, Recipe, RecipeIngredient
+from app.services import jobs, match_service
+from app.services.single_flight import SingleFlight
+
+
+suggest_flight = SingleFlight()
 
 
-def suggest_recipes_for_user(db: Session, user_id: int):
+def suggest_recipes_for_user(db: Session, user_id: int, max_missing: int | None = None):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    recipes = db.query(Recipe).all()
+    counts = match_service.missing_counts(db, user_id, max_missing)
+    query = db.query(Recipe).options(
+        selectinload(Recipe.recipe_ingredients).joinedload(RecipeIngredient.ingredient)
+    )
+    if max_missing is not None:
+        query = query.filter(Recipe.id.in_([recipe_id for recipe_id, _ in counts]))
+    recipes = {recipe.id: recipe for recipe in query}
     result = []
 
     user_ingredients = {
         ui.ingredient.name for ui in user.user_ingredients
     }
 
-    for recipe in recipes:
+    for recipe_id, missing_count in counts:
+        recipe = recipes.get(recipe_id)
+        if recipe is None:
+            continue
         recipe_ingredients = {
             ri.ingredient.name for ri in recipe.recipe_ingredients
         }
 
         missing = list(recipe_ingredients - user_ingredients)
-        can_make = len(missing) == 0
 
         result.append({
             "id": recipe.id,
             "name": recipe.name,
-            "can_make": can_make,
+            "can_make": missing_count == 0,
+            "missing_count": missing_count,
             "missing_ingredients": missing,
             "used_ingredients": list(recipe_ingredients),
         })
 
     return result
+
+
+def suggest_recipes_coalesced(db: Session, user_id: int, max_missing: int | None = None):
+    """``suggest_recipes_for_user``, shared between concurrent calls for a user."""
+    return suggest_flight.do(
+        (user_id, max_missing), suggest_recipes_for_user, db, user_id, max_missing
+    )
+
+
+def makeable_recipe_ids(db: Session, user_id: int):
+    """Ids of recipes whose every ingredient is in the user's fridge."""
+    return {recipe_id for recipe_id, _ in match_service.missing_counts(db, user_id, 0)}
+
+
+@jobs.handler("recipe_matches.rebuild")
+def rebuild_recipe_matches(db: Session, payload: dict):
+    """Recompute ``user_recipe_match`` rows for ``payload["recipe_ids"]``."""
+    match_service.rebuild_recipe_matches(
+        db, recipe_ids=[UUID(recipe_id) for recipe_id in payload["recipe_ids"]]
+    )
+    db.commit()
+
+
+@jobs.handler("recipe_matches.verify")
+def verify_recipe_matches(db: Session, payload: dict):
+    """Check ``user_recipe_match`` against a full recompute.
+
+    With ``{"repair": true}`` mismatching data is rebuilt; otherwise the job
+    fails and reports the differences in ``last_error``.
+    """
+    user_id = payload.get("user_id")
+    differences = match_service.verify_recipe_matches(db, user_id)
+    if not differences:
+        return
+    if payload.get("repair"):
+        match_service.rebuild_recipe_matches(db, user_id)
+        db.commit()
+        return
+    raise RuntimeError(
+        f"{len(differences)} user_recipe_match rows differ, e.g. {differences[:5]}"
+    )
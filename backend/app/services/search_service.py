@@ -0,0 +1,187 @@
+"""Full-text search over recipe name, description and instructions.
+
+On PostgreSQL, recipes get a generated ``search_vector`` tsvector column
+(name weighted above description above instructions) with a GIN index, and
+queries use ``websearch_to_tsquery``/``ts_rank``. Other databases (SQLite in
+development) use an in-process inverted index built on first use and kept
+current through the change-event bus.
+
+Both return ranked recipe ids only; callers intersect them with other id
+sets (e.g. recipes the user can make now) before loading any rows.
+"""
+import math
+import re
+import threading
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.events import change_bus
+from app.models import Recipe
+
+
+SEARCH_CONFIG = "english"
+FIELD_WEIGHTS = {"name": 3.0, "description": 2.0, "instructions": 1.0}
+
+_POSTGRES_DDL = (
+    f"""
+    ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(instructions, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_recipes_search_vector "
+    "ON recipes USING GIN (search_vector)",
+)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def ensure_search_schema(engine):
+    """Add the tsvector column and GIN index on PostgreSQL; no-op elsewhere."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for statement in _POSTGRES_DDL:
+            conn.execute(text(statement))
+
+
+def tokenize(value: str | None):
+    if not value:
+        return []
+    return [token for token in _TOKEN.findall(value.lower()) if len(token) > 1]
+
+
+class InvertedIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._documents = {}
+
+    def __len__(self):
+        return len(self._documents)
+
+    def update(self, recipe_id, fields: dict):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+
+        with self._lock:
+            self.remove(recipe_id)
+            self._documents[recipe_id] = set(weights)
+            for token, weight in weights.items():
+                self._postings.setdefault(token, {})[recipe_id] = weight
+
+    def remove(self, recipe_id):
+        with self._lock:
+            for token in self._documents.pop(recipe_id, ()):
+                postings = self._postings[token]
+                del postings[recipe_id]
+                if not postings:
+                    del self._postings[token]
+
+    def search(self, query: str):
+        """Ids of recipes containing every query term, best match first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            total = len(self._documents)
+
+            scores = {}
+            for recipe_id in postings[0]:
+                score = 0.0
+                for term_postings in postings:
+                    weight = term_postings.get(recipe_id)
+                    if weight is None:
+                        break
+                    idf = math.log(1 + total / len(term_postings))
+                    score += (1 + math.log(weight)) * idf
+                else:
+                    scores[recipe_id] = score
+
+        return sorted(scores, key=scores.get, reverse=True)
+
+
+_index = InvertedIndex()
+# Guards ``_index``, ``_built`` and ``_pending``; only ever held briefly, since
+# ``_on_change`` runs inside ``ChangeBus.publish`` on a committing thread.
+_lock = threading.Lock()
+# Serialises first-time builds, which scan ``recipes``.
+_build_lock = threading.Lock()
+_built = False
+# Changes published while a build is running, replayed onto the new index.
+_pending = None
+
+
+def _ensure_index(db: Session):
+    global _index, _built, _pending
+    if _built:
+        return
+    with _build_lock:
+        if _built:
+            return
+        with _lock:
+            _pending = []
+
+        # Changes committed from here on may also be in the snapshot; each
+        # carries the full row, so replaying them is harmless.
+        index = InvertedIndex()
+        for recipe_id, name, description, instructions in db.query(
+            Recipe.id, Recipe.name, Recipe.description, Recipe.instructions
+        ):
+            index.update(recipe_id, {
+                "name": name,
+                "description": description,
+                "instructions": instructions,
+            })
+
+        with _lock:
+            for change in _pending:
+                _apply(index, change)
+            _index, _built, _pending = index, True, None
+
+
+def _apply(index: InvertedIndex, change: schemas.ChangeEvent):
+    if change.op == "deleted":
+        index.remove(change.data["id"])
+    else:
+        index.update(change.data["id"], change.data)
+
+
+def _on_change(change: schemas.ChangeEvent):
+    with _lock:
+        if _pending is not None:
+            _pending.append(change)
+        elif _built:
+            _apply(_index, change)
+
+
+change_bus.subscribe(_on_change, entities=["Recipe"])
+
+
+def search_recipe_ids(db: Session, query: str, limit: int | None = None):
+    """Ranked ids of recipes matching ``query``."""
+    if db.bind.dialect.name == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        vector = literal_column("search_vector")
+        stmt = (
+            select(Recipe.id)
+            .where(vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc())
+            .limit(limit)
+        )
+        return list(db.scalars(stmt))
+
+    _ensure_index(db)
+    ids = _index.search(query)
+    return ids if limit is None else ids[:limit]
@@ -0,0 +1,96 @@
+import threading
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.events import change_bus
+from app.models import Recipe, RecipeIngredient
+from app.services.similarity_index import MinHashLSHIndex
+
+
+_index = MinHashLSHIndex()
+# Guards ``_index``, ``_built`` and ``_pending``; only ever held briefly, since
+# ``_on_change`` runs inside ``ChangeBus.publish`` on a committing thread.
+_lock = threading.Lock()
+# Serialises first-time builds, which scan ``recipe_ingredients``.
+_build_lock = threading.Lock()
+_built = False
+# Changes published while a build is running, replayed onto the new index.
+_pending = None
+
+
+def _ensure_index(db: Session):
+    global _index, _built, _pending
+    if _built:
+        return
+    with _build_lock:
+        if _built:
+            return
+        with _lock:
+            _pending = []
+
+        # Anything committed from here on is both buffered and possibly in the
+        # snapshot; replaying it is harmless because each change sets the
+        # recipe's final membership for that ingredient.
+        sets = {}
+        for recipe_id, ingredient_id in db.query(
+            RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id
+        ):
+            sets.setdefault(recipe_id, set()).add(ingredient_id)
+        index = MinHashLSHIndex()
+        for recipe_id, ingredients in sets.items():
+            index.update(recipe_id, ingredients)
+
+        with _lock:
+            for change in _pending:
+                _apply(index, change)
+            _index, _built, _pending = index, True, None
+
+
+def _apply(index: MinHashLSHIndex, change: schemas.ChangeEvent):
+    if change.entity == "Recipe":
+        if change.op == "deleted":
+            index.remove(change.data["id"])
+        return
+
+    recipe_id = change.data["recipe_id"]
+    ingredients = set(index.get(recipe_id) or ())
+    if change.op == "created":
+        ingredients.add(change.data["ingredient_id"])
+    elif change.op == "deleted":
+        ingredients.discard(change.data["ingredient_id"])
+    index.update(recipe_id, ingredients)
+
+
+def _on_change(change: schemas.ChangeEvent):
+    with _lock:
+        if _pending is not None:
+            _pending.append(change)
+        elif _built:
+            _apply(_index, change)
+        # Until the first query builds the index from the database there is
+        # nothing to keep up to date.
+
+
+change_bus.subscribe(_on_change, entities=["Recipe", "RecipeIngredient"])
+
+
+def similar_recipes(db: Session, recipe_id: UUID, limit: int = 10):
+    crud.get_recipe(db, recipe_id)
+    _ensure_index(db)
+
+    neighbours = _index.similar(recipe_id, limit)
+    if not neighbours:
+        return []
+
+    names = dict(
+        db.query(Recipe.id, Recipe.name)
+        .filter(Recipe.id.in_([other for other, _ in neighbours]))
+        .all()
+    )
+    return [
+        {"id": other, "name": names[other], "similarity": round(score, 4)}
+        for other, score in neighbours
+        if other in names
+    ]
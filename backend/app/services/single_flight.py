@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent identical calls.
+
+    Only calls that overlap in time are coalesced; nothing is cached once the
+    leader finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "hit_rate": self.coalesced / self.calls if self.calls else 0.0,
+                "in_flight": len(self._in_flight),
+            }
@@ -0,0 +1,167 @@
+"""Opt-in write coalescing and group commit for fridge updates.
+
+Clients that decrement quantities while cooking send bursts of
+``PUT /users/{user_id}/ingredients/{ingredient_id}``. With coalescing enabled,
+updates to the same ``(user_id, ingredient_id)`` that arrive within
+``FRIDGE_COALESCE_WINDOW_MS`` are merged (last value per field wins, matching
+PUT semantics) and written with a single ``UPDATE ... RETURNING``. With group
+commit enabled, every key pending in the same window is written in one
+transaction, so a burst across many items costs one commit instead of one
+each.
+
+Configuration (environment variables):
+
+``FRIDGE_WRITE_COALESCING``
+    ``1`` to enable the coalesced write path. Default ``0``.
+``FRIDGE_COALESCE_WINDOW_MS``
+    How long the first write of a batch waits for others to join. Default
+    ``20``. This is added to the latency of every coalesced request.
+``FRIDGE_GROUP_COMMIT``
+    ``1`` to commit all keys of a window in one transaction. Default ``1``.
+    If the shared transaction fails, each key is retried in its own
+    transaction so one bad row does not fail the others.
+``FRIDGE_SYNCHRONOUS_COMMIT``
+    ``on`` (default) or ``off``. ``off`` issues
+    ``SET LOCAL synchronous_commit TO OFF`` on PostgreSQL for coalesced
+    transactions only; ignored on other databases.
+
+Durability: a coalesced request is only answered after its transaction has
+committed, so with ``FRIDGE_SYNCHRONOUS_COMMIT=on`` an acknowledged update is
+as durable as on the regular path. Intermediate values that were overwritten
+inside a window are never stored. With ``FRIDGE_SYNCHRONOUS_COMMIT=off`` the
+commit returns before the WAL is flushed: a database crash can lose the last
+few hundred milliseconds of acknowledged updates (the database stays
+consistent, it just rolls back to a slightly earlier state).
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app import crud, schemas
+from app.database import SessionLocal
+
+
+WRITE_COALESCING = os.getenv("FRIDGE_WRITE_COALESCING", "0") == "1"
+COALESCE_WINDOW_MS = int(os.getenv("FRIDGE_COALESCE_WINDOW_MS", "20"))
+GROUP_COMMIT = os.getenv("FRIDGE_GROUP_COMMIT", "1") == "1"
+SYNCHRONOUS_COMMIT = os.getenv("FRIDGE_SYNCHRONOUS_COMMIT", "on").lower() != "off"
+
+
+class _PendingWrite:
+    def __init__(self):
+        self.values = {}
+        self.futures = []
+
+
+class WriteCoalescer:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        window_ms: int = COALESCE_WINDOW_MS,
+        group_commit: bool = GROUP_COMMIT,
+        synchronous_commit: bool = SYNCHRONOUS_COMMIT,
+    ):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.group_commit = group_commit
+        self.synchronous_commit = synchronous_commit
+
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def update_user_ingredient(
+        self,
+        user_id: int,
+        ingredient_id: int,
+        data: schemas.UserIngredientUpdate
+    ):
+        """Queue an update and block until the batch containing it commits."""
+        future = Future()
+
+        with self._cond:
+            self._ensure_worker()
+            entry = self._pending.get((user_id, ingredient_id))
+            if entry is None:
+                entry = self._pending[(user_id, ingredient_id)] = _PendingWrite()
+            if data.quantity is not None:
+                entry.values["quantity"] = data.quantity
+            if data.expiry_date is not None:
+                entry.values["expiry_date"] = data.expiry_date
+            entry.futures.append(future)
+            self._cond.notify()
+
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="fridge-write-coalescer", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+            # Let the rest of the burst join this batch.
+            time.sleep(self.window)
+
+            with self._cond:
+                batch, self._pending = self._pending, {}
+
+            self._flush(batch)
+
+    def _flush(self, batch: dict):
+        if self.group_commit and len(batch) > 1:
+            try:
+                self._write(batch)
+                return
+            except Exception:
+                pass
+
+        for key, entry in batch.items():
+            try:
+                self._write({key: entry})
+            except Exception as exc:
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _write(self, batch: dict):
+        db = self.session_factory()
+        try:
+            if not self.synchronous_commit and db.bind.dialect.name == "postgresql":
+                db.execute(text("SET LOCAL synchronous_commit TO OFF"))
+
+            results = {}
+            for (user_id, ingredient_id), entry in batch.items():
+                results[(user_id, ingredient_id)] = crud.update_user_ingredient_returning(
+                    db, user_id, ingredient_id, entry.values
+                )
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for key, entry in batch.items():
+            for future in entry.futures:
+                if results[key] is None:
+                    future.set_exception(HTTPException(
+                        status_code=404,
+                        detail="Ingredient not found in user's fridge"
+                    ))
+                else:
+                    future.set_result(results[key])
+
+
+write_coalescer = WriteCoalescer()
@@ -0,0 +1,105 @@
+"""Exact vs MinHash/LSH recipe similarity: recall@k and query latency.
+
+Run from ``backend/``::
+
+    python -m benchmarks.similarity_benchmark --recipes 100000
+
+    python -m benchmarks.similarity_benchmark --recipes 20000 --overlap realistic
+
+Recipes are synthetic, drawn from a skewed ingredient vocabulary. With
+``--overlap variants`` (the default) they are variations of a few thousand
+base recipes, so real near-duplicates exist. With ``--overlap realistic``
+every recipe is drawn independently, so most neighbours share only one or
+two ingredients; this exercises the fallback scan in ``similar``.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.similarity_index import MinHashLSHIndex, exact_similar
+
+
+def generate_recipes(count: int, vocabulary: int, seed: int, overlap: str = "variants"):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    ingredients = list(range(vocabulary))
+
+    def draw(size):
+        items = set()
+        while len(items) < size:
+            items.add(rng.choices(ingredients, weights)[0])
+        return items
+
+    if overlap == "realistic":
+        return {key: frozenset(draw(rng.randint(5, 12))) for key in range(count)}
+
+    bases = [draw(rng.randint(5, 15)) for _ in range(max(count // 20, 1))]
+    recipes = {}
+    for key in range(count):
+        items = set(rng.choice(bases))
+        for _ in range(rng.randint(0, 3)):
+            if len(items) > 3:
+                items.discard(rng.choice(sorted(items)))
+        for _ in range(rng.randint(0, 3)):
+            items.add(rng.choices(ingredients, weights)[0])
+        recipes[key] = frozenset(items)
+    return recipes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--overlap", choices=("variants", "realistic"), default="variants")
+    args = parser.parse_args()
+
+    recipes = generate_recipes(args.recipes, args.vocabulary, args.seed, args.overlap)
+
+    started = time.perf_counter()
+    index = MinHashLSHIndex()
+    for key, items in recipes.items():
+        index.update(key, items)
+    build_seconds = time.perf_counter() - started
+
+    queries = random.Random(args.seed).sample(list(recipes), args.queries)
+    exact_ms, approx_ms, recalls, empty = [], [], [], 0
+    for key in queries:
+        started = time.perf_counter()
+        exact = exact_similar(recipes, key, args.limit)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        approx = index.similar(key, args.limit)
+        approx_ms.append((time.perf_counter() - started) * 1000)
+
+        if exact and not approx:
+            empty += 1
+        if exact:
+            # Ties at the cut-off make neighbour ids ambiguous, so compare the
+            # score of the k-th neighbour instead of the ids themselves.
+            threshold = exact[-1][1]
+            found = sum(1 for _, score in approx if score >= threshold)
+            recalls.append(min(found, len(exact)) / len(exact))
+
+    def describe(samples):
+        samples = sorted(samples)
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        return f"mean {statistics.mean(samples):8.2f} ms  p95 {p95:8.2f} ms"
+
+    print(
+        f"recipes: {args.recipes}  overlap: {args.overlap}  "
+        f"queries: {args.queries}  k: {args.limit}"
+    )
+    print(f"lsh build: {build_seconds:.1f} s")
+    print(f"exact: {describe(exact_ms)}")
+    print(f"lsh:   {describe(approx_ms)}")
+    print(f"lsh recall@{args.limit}: {statistics.mean(recalls):.3f}")
+    print(f"lsh empty results with exact neighbours: {empty}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+# app.database reads these at import time.
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["JOB_WORKERS"] = "0"
+
+import pytest
+
+from app.database import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
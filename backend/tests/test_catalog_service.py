@@ -0,0 +1,42 @@
+from sqlalchemy import update
+
+from app import crud, models, schemas
+from app.services import catalog_service
+
+
+def _version(db):
+    return db.get(models.CatalogVersion, 1).version
+
+
+def test_version_moves_with_the_transaction(db, monkeypatch):
+    monkeypatch.setattr(catalog_service, "_cached_until", 0.0)
+    catalog_service.ensure_catalog_version(db)
+
+    crud.create_ingredient(db, schemas.IngredientCreate(name="egg", default_shelf_life_days=7))
+    assert _version(db) == 1
+
+    db.add(models.Ingredient(name="milk", default_shelf_life_days=5))
+    db.flush()
+    db.rollback()
+    assert _version(db) == 1
+
+
+def test_etag_follows_changes_from_other_workers(db, monkeypatch):
+    monkeypatch.setattr(catalog_service, "_cached_until", 0.0)
+    monkeypatch.setattr(catalog_service, "CATALOG_VERSION_TTL_SECONDS", 60.0)
+    catalog_service.ensure_catalog_version(db)
+    first = catalog_service.catalog_etag(db, "ingredients")
+
+    # A commit in this process drops the cached version straight away.
+    crud.create_ingredient(db, schemas.IngredientCreate(name="egg", default_shelf_life_days=7))
+    second = catalog_service.catalog_etag(db, "ingredients")
+    assert second != first
+
+    # Another worker's commit only reaches the counter row.
+    db.execute(
+        update(models.CatalogVersion).values(version=models.CatalogVersion.version + 1)
+    )
+    db.commit()
+    assert catalog_service.catalog_etag(db, "ingredients") == second
+    monkeypatch.setattr(catalog_service, "_cached_until", 0.0)
+    assert catalog_service.catalog_etag(db, "ingredients") not in (first, second)
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.events import ChangeBus
+
+
+def _first(bus, since):
+    async def read():
+        stream = bus.stream(since=since)
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    return asyncio.run(read())
+
+
+def _publish(bus, count):
+    bus.publish([("created", "Ingredient", {"id": n}) for n in range(count)])
+
+
+def test_replays_events_after_known_id():
+    bus = ChangeBus()
+    _publish(bus, 3)
+
+    line = _first(bus, bus.event_id(1))
+
+    assert line.startswith(f"id: {bus.event_id(2)}\nevent: created")
+
+
+def test_id_ahead_of_bus_resets():
+    bus = ChangeBus()
+    _publish(bus, 2)
+
+    line = _first(bus, bus.event_id(50))
+
+    assert line == f"id: {bus.event_id(2)}\nevent: reset\ndata: 2\n\n"
+
+
+def test_id_from_another_process_resets():
+    bus = ChangeBus()
+    _publish(bus, 2)
+
+    line = _first(bus, "deadbeef.1")
+
+    assert "event: reset" in line
+
+
+def test_id_dropped_from_buffer_resets():
+    bus = ChangeBus(buffer_size=2)
+    _publish(bus, 5)
+
+    line = _first(bus, bus.event_id(1))
+
+    assert "event: reset" in line
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from app.services import jobs
+
+
+def _expire_lease(db, job, attempts):
+    job.status = "running"
+    job.attempts = attempts
+    job.locked_until = jobs._now() - timedelta(seconds=1)
+    db.commit()
+
+
+def test_failing_job_is_retried_then_failed(db):
+    calls = []
+
+    @jobs.handler("test.fails")
+    def fails(work, payload):
+        calls.append(payload)
+        raise ValueError("boom")
+
+    job = jobs.enqueue(db, "test.fails", {"n": 1}, max_attempts=2)
+    db.commit()
+
+    assert jobs.run_next()
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("queued", 1)
+
+    job.run_after = jobs._now()
+    db.commit()
+    assert jobs.run_next()
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert len(calls) == 2
+
+
+def test_expired_lease_is_reclaimed_while_attempts_remain(db):
+    @jobs.handler("test.ok")
+    def ok(work, payload):
+        pass
+
+    job = jobs.enqueue(db, "test.ok", max_attempts=3)
+    db.commit()
+    _expire_lease(db, job, attempts=1)
+
+    assert jobs.run_next()
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("succeeded", 2)
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(db):
+    job = jobs.enqueue(db, "test.ok", max_attempts=2)
+    db.commit()
+    _expire_lease(db, job, attempts=2)
+
+    assert not jobs.run_next()
+    db.refresh(job)
+    assert job.status == "failed"
+    assert job.attempts == 2
+    assert job.last_error == "Lease expired on the final attempt"
+
+
+def test_dedupe_key_reuses_queued_job(db):
+    first = jobs.enqueue(db, "test.ok", dedupe_key="k")
+    db.commit()
+
+    second = jobs.enqueue(db, "test.ok", dedupe_key="k", priority=5)
+    db.commit()
+
+    assert second.id == first.id
+    assert second.priority == 5
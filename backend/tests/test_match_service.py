@@ -0,0 +1,109 @@
+from app import crud, models, schemas
+from app.database import SessionLocal
+from app.services import jobs, match_service
+from app.services.recipe_service import suggest_recipes_for_user
+
+
+def _ingredient(db, name):
+    return crud.create_ingredient(
+        db, schemas.IngredientCreate(name=name, default_shelf_life_days=7)
+    ).id
+
+
+def _recipe(db, name, *ingredient_ids):
+    recipe_id = crud.create_recipe(
+        db,
+        schemas.RecipeCreate(name=name, recipe_type="internal", instructions="cook"),
+    ).id
+    for ingredient_id in ingredient_ids:
+        crud.add_ingredient_to_recipe(db, recipe_id, ingredient_id)
+    return recipe_id
+
+
+def _stock(db, user_id, ingredient_id):
+    crud.add_user_ingredient(
+        db, user_id, schemas.UserIngredientCreate(ingredient_id=ingredient_id, quantity=1)
+    )
+
+
+def _assert_consistent(db):
+    assert match_service.verify_recipe_matches(db) == []
+    for recipe in db.query(models.Recipe).populate_existing():
+        assert recipe.ingredient_count == len(recipe.recipe_ingredients)
+
+
+def _counts(db, user_id, max_missing=None):
+    return dict(match_service.missing_counts(db, user_id, max_missing))
+
+
+def test_every_change_keeps_matches_consistent(db):
+    egg, milk, flour = (_ingredient(db, name) for name in ("egg", "milk", "flour"))
+    alice = crud.create_user(db, schemas.UserCreate(email="alice@example.com")).id
+    bob = crud.create_user(db, schemas.UserCreate(email="bob@example.com")).id
+    pancake = _recipe(db, "pancake", egg, milk)
+    omelette = _recipe(db, "omelette", egg)
+
+    steps = [
+        lambda: _stock(db, alice, egg),
+        lambda: _stock(db, alice, milk),
+        lambda: _stock(db, bob, milk),
+        lambda: crud.add_ingredient_to_recipe(db, pancake, flour),
+        lambda: crud.add_ingredient_to_recipe(db, omelette, milk),
+        lambda: crud.remove_ingredient_from_recipe(db, pancake, milk),
+        lambda: crud.delete_user_ingredient(db, alice, egg),
+        lambda: crud.delete_recipe(db, omelette),
+        # Rebuilds its recipes through a job.
+        lambda: (crud.delete_ingredient(db, flour), jobs.run_next()),
+        lambda: crud.delete_user(db, bob),
+    ]
+    for step in steps:
+        step()
+        db.expire_all()
+        _assert_consistent(db)
+
+    assert _counts(db, alice) == {pancake: 1}
+
+
+def test_suggestions_list_every_recipe(db):
+    egg, milk = _ingredient(db, "egg"), _ingredient(db, "milk")
+    user = crud.create_user(db, schemas.UserCreate(email="cook@example.com")).id
+    pancake = _recipe(db, "pancake", egg, milk)
+    toast = _recipe(db, "toast")
+
+    suggestions = suggest_recipes_for_user(db, user)
+    assert [(row["id"], row["can_make"], row["missing_count"]) for row in suggestions] == [
+        (toast, True, 0),
+        (pancake, False, 2),
+    ]
+
+    _stock(db, user, egg)
+    assert _counts(db, user) == {toast: 0, pancake: 1}
+    assert _counts(db, user, max_missing=0) == {toast: 0}
+    assert _counts(db, user, max_missing=1) == {toast: 0, pancake: 1}
+
+
+def test_ingredient_delete_queues_the_rebuild_with_the_change(db):
+    egg, milk = _ingredient(db, "egg"), _ingredient(db, "milk")
+    user = crud.create_user(db, schemas.UserCreate(email="cook@example.com")).id
+    _stock(db, user, milk)
+    pancake = _recipe(db, "pancake", egg, milk)
+    omelette = _recipe(db, "omelette", egg)
+
+    crud.delete_ingredient(db, egg)
+
+    # The job is committed together with the delete.
+    with SessionLocal() as other:
+        queued = other.query(models.Job).filter(models.Job.status == "queued").all()
+        assert other.get(models.Ingredient, egg) is None
+    assert [(job.kind, job.dedupe_key) for job in queued] == [
+        ("recipe_matches.rebuild", f"recipe_matches.rebuild:ingredient:{egg}")
+    ]
+    assert sorted(queued[0].payload["recipe_ids"]) == sorted([str(pancake), str(omelette)])
+    # Sizes are fixed with the delete; only the rows wait for the job.
+    assert _counts(db, user) == {omelette: 0, pancake: 1}
+    assert match_service.verify_recipe_matches(db) != []
+
+    assert jobs.run_next()
+    db.expire_all()
+    _assert_consistent(db)
+    assert _counts(db, user) == {omelette: 0, pancake: 0}
@@ -0,0 +1,92 @@
+import asyncio
+
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import CompressionMiddleware
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return JSONResponse(["item"] * 100, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/cached")
+    def cached():
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+
+    return TestClient(app)
+
+
+def test_large_json_is_compressed_with_suffixed_etag():
+    response = _client().get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == ["item"] * 100
+
+
+def test_brotli_is_preferred_when_accepted():
+    response = _client().get("/big", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] == '"v1-br"'
+    assert response.json() == ["item"] * 100
+
+
+def test_uncompressed_json_still_varies_on_encoding():
+    client = _client()
+
+    for path, accept in (("/small", "gzip"), ("/big", "identity")):
+        response = client.get(path, headers={"Accept-Encoding": accept})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_not_modified_echoes_the_suffixed_etag():
+    client = _client()
+
+    response = client.get(
+        "/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": '"v1-gzip"'}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"v1-gzip"'
+
+    response = client.get(
+        "/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": '"v1"'}
+    )
+    assert response.headers["etag"] == '"v1"'
+
+
+def test_event_stream_headers_are_not_held_back():
+    sent = []
+    body_sent = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream")],
+        })
+        # The start message must be out before the first event is written.
+        assert [message["type"] for message in sent] == ["http.response.start"]
+        await send({"type": "http.response.body", "body": b": hi\n\n" * 100, "more_body": True})
+        body_sent.set()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+
+    assert body_sent.is_set()
+    assert sent[1]["body"] == b": hi\n\n" * 100
@@ -0,0 +1,80 @@
+import fakeredis
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import rate_limit
+from app.services.rate_limit import MemoryBackend, RateLimiter, RedisBackend
+
+
+def _client(backend=None):
+    limiter = RateLimiter(backend or MemoryBackend())
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(limiter.limit("limited", rate=0.001, capacity=2))])
+    def limited(user_id: int):
+        return {"user_id": user_id}
+
+    return TestClient(app), limiter
+
+
+def test_throttles_per_user():
+    client, _ = _client()
+
+    codes = [client.get("/limited", params={"user_id": 1}).status_code for _ in range(3)]
+
+    assert codes == [200, 200, 429]
+    assert client.get("/limited", params={"user_id": 2}).status_code == 200
+
+
+def test_equivalent_ids_share_a_bucket():
+    client, _ = _client()
+
+    codes = [
+        client.get("/limited", params={"user_id": value}).status_code
+        for value in ("1", "01", "+1")
+    ]
+
+    assert codes == [200, 200, 429]
+
+
+def test_invalid_requests_take_no_tokens():
+    client, limiter = _client()
+
+    for _ in range(5):
+        assert client.get("/limited").status_code == 422
+        assert client.get("/limited", params={"user_id": "abc"}).status_code == 422
+
+    assert client.get("/limited", params={"user_id": 1}).status_code == 200
+    assert limiter.stats() == {"limited": {"allowed": 1, "throttled": 0}}
+
+
+def test_redis_backend_runs_the_bucket_script(monkeypatch):
+    client = fakeredis.FakeRedis()
+    backend = RedisBackend(client=client)
+    now = [1_000.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+
+    assert backend.take("r:1", rate=0.5, capacity=2) == (True, 0.0)
+    assert backend.take("r:1", rate=0.5, capacity=2) == (True, 0.0)
+    assert backend.take("r:1", rate=0.5, capacity=2) == (False, 2.0)
+    assert backend.take("r:2", rate=0.5, capacity=2) == (True, 0.0)
+
+    now[0] += 1
+    assert backend.take("r:1", rate=0.5, capacity=2) == (False, 1.0)
+    now[0] += 1
+    assert backend.take("r:1", rate=0.5, capacity=2) == (True, 0.0)
+
+    # Idle buckets expire once they would have refilled completely.
+    assert 0 < client.ttl("ratelimit:r:1") <= 5
+
+
+def test_redis_backend_behind_the_dependency():
+    client, _ = _client(RedisBackend(client=fakeredis.FakeRedis()))
+
+    codes = [
+        client.get("/limited", params={"user_id": value}).status_code
+        for value in ("1", "01", "+1")
+    ]
+
+    assert codes == [200, 200, 429]
+    assert client.get("/limited", params={"user_id": 2}).status_code == 200
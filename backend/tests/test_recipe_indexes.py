@@ -0,0 +1,106 @@
+import threading
+import uuid
+
+from app import crud, schemas
+from app.events import ChangeBus
+from app.services import search_service, similarity_service
+
+
+def _recipe(db, name):
+    return crud.create_recipe(
+        db,
+        schemas.RecipeCreate(name=name, recipe_type="internal", instructions="cook"),
+    ).id
+
+
+def test_indexes_follow_recipe_edits_without_job_workers(db, monkeypatch):
+    monkeypatch.setattr(similarity_service, "_index", similarity_service.MinHashLSHIndex())
+    monkeypatch.setattr(similarity_service, "_built", False)
+    monkeypatch.setattr(search_service, "_index", search_service.InvertedIndex())
+    monkeypatch.setattr(search_service, "_built", False)
+
+    egg = crud.create_ingredient(db, schemas.IngredientCreate(name="egg", default_shelf_life_days=7))
+    r1 = _recipe(db, "omelette")
+    r2 = _recipe(db, "soup")
+    crud.add_ingredient_to_recipe(db, r1, egg.id)
+
+    # Build both indexes before the edits.
+    assert similarity_service.similar_recipes(db, r1) == []
+    assert search_service.search_recipe_ids(db, "tomato") == []
+
+    crud.add_ingredient_to_recipe(db, r2, egg.id)
+    crud.update_recipe(db, r2, schemas.RecipeUpdate(
+        name="soup", recipe_type="internal", instructions="cook", description="tomato soup",
+    ))
+
+    assert [row["id"] for row in similarity_service.similar_recipes(db, r1)] == [r2]
+    assert search_service.search_recipe_ids(db, "tomato soup") == [r2]
+
+    crud.delete_recipe(db, r2)
+
+    assert similarity_service.similar_recipes(db, r1) == []
+    assert search_service.search_recipe_ids(db, "tomato") == []
+
+
+class _PausedScan:
+    """Stands in for the session during a cold build; the scan blocks until released."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def query(self, *columns):
+        self.started.set()
+        self.release.wait(5)
+        return iter(self.rows)
+
+
+def test_cold_similarity_build_does_not_block_publishers(monkeypatch):
+    monkeypatch.setattr(similarity_service, "_index", similarity_service.MinHashLSHIndex())
+    monkeypatch.setattr(similarity_service, "_built", False)
+    r1, r2 = uuid.uuid4(), uuid.uuid4()
+    scan = _PausedScan([(r1, 1), (r1, 2)])
+    bus = ChangeBus()
+    bus.subscribe(similarity_service._on_change, entities=["RecipeIngredient"])
+
+    builder = threading.Thread(target=similarity_service._ensure_index, args=(scan,))
+    builder.start()
+    assert scan.started.wait(5)
+
+    publisher = threading.Thread(target=bus.publish, args=([
+        ("created", "RecipeIngredient", {"recipe_id": r2, "ingredient_id": 1}),
+        ("created", "RecipeIngredient", {"recipe_id": r2, "ingredient_id": 2}),
+    ],))
+    publisher.start()
+    publisher.join(1)
+    assert not publisher.is_alive()
+
+    scan.release.set()
+    builder.join(5)
+    assert similarity_service._index.get(r1) == {1, 2}
+    assert similarity_service._index.get(r2) == {1, 2}
+
+
+def test_cold_search_build_does_not_block_publishers(monkeypatch):
+    monkeypatch.setattr(search_service, "_index", search_service.InvertedIndex())
+    monkeypatch.setattr(search_service, "_built", False)
+    r1, r2 = uuid.uuid4(), uuid.uuid4()
+    scan = _PausedScan([(r1, "tomato soup", None, "simmer")])
+    bus = ChangeBus()
+    bus.subscribe(search_service._on_change, entities=["Recipe"])
+
+    builder = threading.Thread(target=search_service._ensure_index, args=(scan,))
+    builder.start()
+    assert scan.started.wait(5)
+
+    publisher = threading.Thread(target=bus.publish, args=([
+        ("created", "Recipe", {"id": r2, "name": "tomato salad"}),
+    ],))
+    publisher.start()
+    publisher.join(1)
+    assert not publisher.is_alive()
+
+    scan.release.set()
+    builder.join(5)
+    assert set(search_service._index.search("tomato")) == {r1, r2}
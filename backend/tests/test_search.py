@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.main import app
+from app.services import search_service
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    # Start from an empty in-process index for this test's database.
+    monkeypatch.setattr(search_service, "_index", search_service.InvertedIndex())
+    monkeypatch.setattr(search_service, "_built", False)
+    return TestClient(app)
+
+
+def _recipe(db, name, description=None, instructions="cook", ingredients=()):
+    recipe_id = crud.create_recipe(db, schemas.RecipeCreate(
+        name=name, recipe_type="internal", description=description, instructions=instructions,
+    )).id
+    for ingredient_id in ingredients:
+        crud.add_ingredient_to_recipe(db, recipe_id, ingredient_id)
+    return str(recipe_id)
+
+
+def _ids(response):
+    assert response.status_code == 200
+    return [recipe["id"] for recipe in response.json()]
+
+
+def test_name_outranks_description_outranks_instructions(db, client):
+    in_instructions = _recipe(db, "stew", instructions="finish with basil")
+    in_description = _recipe(db, "soup", description="basil and tomato")
+    in_name = _recipe(db, "basil pesto")
+
+    assert _ids(client.get("/recipes/search", params={"q": "basil"})) == [
+        in_name, in_description, in_instructions,
+    ]
+    assert _ids(client.get("/recipes/search", params={"q": "basil tomato"})) == [in_description]
+    assert _ids(client.get("/recipes/search", params={"q": "basil", "limit": 1})) == [in_name]
+
+
+def test_can_make_keeps_only_recipes_the_user_can_make(db, client):
+    egg = crud.create_ingredient(db, schemas.IngredientCreate(name="egg", default_shelf_life_days=7)).id
+    flour = crud.create_ingredient(db, schemas.IngredientCreate(name="flour", default_shelf_life_days=90)).id
+    user = crud.create_user(db, schemas.UserCreate(email="cook@example.com")).id
+    crud.add_user_ingredient(db, user, schemas.UserIngredientCreate(ingredient_id=egg, quantity=6))
+    omelette = _recipe(db, "egg omelette", ingredients=[egg])
+    cake = _recipe(db, "egg cake", ingredients=[egg, flour])
+
+    assert set(_ids(client.get("/recipes/search", params={"q": "egg"}))) == {omelette, cake}
+    assert _ids(client.get(
+        "/recipes/search", params={"q": "egg", "can_make": True, "user_id": user}
+    )) == [omelette]
+
+
+def test_can_make_requires_a_user(db, client):
+    response = client.get("/recipes/search", params={"q": "egg", "can_make": True})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "can_make requires user_id"}
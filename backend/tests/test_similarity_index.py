@@ -0,0 +1,49 @@
+from app.services.similarity_index import MinHashLSHIndex, exact_similar, jaccard
+
+
+def test_similar_ranks_by_jaccard():
+    index = MinHashLSHIndex()
+    index.update("pancake", {"egg", "milk", "flour", "sugar"})
+    index.update("crepe", {"egg", "milk", "flour", "butter"})
+    index.update("omelette", {"egg", "butter", "salt"})
+    index.update("salad", {"lettuce", "tomato"})
+
+    assert index.similar("pancake") == [
+        ("crepe", jaccard({"egg", "milk", "flour", "sugar"}, {"egg", "milk", "flour", "butter"})),
+        ("omelette", jaccard({"egg", "milk", "flour", "sugar"}, {"egg", "butter", "salt"})),
+    ]
+    assert index.similar("salad") == []
+    assert index.similar("unknown") == []
+
+
+def test_update_replaces_and_remove_forgets():
+    index = MinHashLSHIndex()
+    index.update("a", {1, 2, 3})
+    index.update("b", {1, 2, 3})
+
+    index.update("b", {7, 8})
+    assert index.get("b") == {7, 8}
+    assert index.similar("a") == []
+
+    index.update("b", {1, 2, 3})
+    index.remove("b")
+    assert "b" not in index and len(index) == 1
+    assert index.similar("a") == []
+
+    # An empty set removes the key as well.
+    index.update("a", set())
+    assert len(index) == 0
+    assert index._buckets == {} and index._postings == {}
+
+
+def test_weakly_similar_recipes_are_found_by_the_fallback():
+    index = MinHashLSHIndex()
+    recipes = {
+        key: set(range(key * 6, key * 6 + 8))  # neighbours share 2 of 8 items
+        for key in range(50)
+    }
+    for key, items in recipes.items():
+        index.update(key, items)
+
+    for key in (0, 17, 49):
+        assert sorted(index.similar(key, 10)) == sorted(exact_similar(recipes, key, 10))
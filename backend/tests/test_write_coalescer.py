@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app import crud, schemas
+from app.database import SessionLocal
+from app.events import change_bus
+from app.services import write_coalescer as coalescer_module
+from app.services.write_coalescer import WriteCoalescer
+
+
+@pytest.fixture
+def fridge(db):
+    user = crud.create_user(db, schemas.UserCreate(email="cook@example.com")).id
+    ingredients = []
+    for name in ("egg", "milk", "flour"):
+        ingredient = crud.create_ingredient(
+            db, schemas.IngredientCreate(name=name, default_shelf_life_days=7)
+        ).id
+        crud.add_user_ingredient(
+            db, user, schemas.UserIngredientCreate(ingredient_id=ingredient, quantity=10)
+        )
+        ingredients.append(ingredient)
+    return user, ingredients
+
+
+@pytest.fixture
+def commits():
+    count = []
+
+    def counted(session):
+        count.append(session)
+
+    event.listen(SessionLocal, "after_commit", counted)
+    yield count
+    event.remove(SessionLocal, "after_commit", counted)
+
+
+@pytest.fixture
+def published():
+    changes = []
+    unsubscribe = change_bus.subscribe(changes.append, entities=["UserIngredient"])
+    yield changes
+    unsubscribe()
+
+
+def _concurrently(coalescer, calls):
+    """Run ``(user_id, ingredient_id, quantity)`` updates at the same time."""
+    barrier = threading.Barrier(len(calls))
+
+    def update(call):
+        user_id, ingredient_id, quantity = call
+        barrier.wait()
+        try:
+            return coalescer.update_user_ingredient(
+                user_id, ingredient_id, schemas.UserIngredientUpdate(quantity=quantity)
+            )
+        except Exception as exc:
+            return exc
+
+    with ThreadPoolExecutor(len(calls)) as pool:
+        return list(pool.map(update, calls))
+
+
+def test_same_key_updates_merge_into_one_write(fridge, commits, published):
+    user, (egg, _, _) = fridge
+    coalescer = WriteCoalescer(window_ms=200)
+
+    results = _concurrently(coalescer, [(user, egg, quantity) for quantity in (9, 8, 7)])
+
+    # One merged UPDATE: every caller sees the row as committed.
+    assert len({result.quantity for result in results}) == 1
+    assert results[0].quantity in (9, 8, 7)
+    assert len(commits) == 1
+    assert [(change.data["ingredient_id"], change.data["quantity"]) for change in published] == [
+        (egg, results[0].quantity)
+    ]
+
+
+def test_group_commit_writes_all_keys_in_one_transaction(fridge, commits, published):
+    user, (egg, milk, flour) = fridge
+    coalescer = WriteCoalescer(window_ms=200)
+
+    results = _concurrently(coalescer, [(user, egg, 1), (user, milk, 2), (user, flour, 3)])
+
+    assert [result.quantity for result in results] == [1, 2, 3]
+    assert len(commits) == 1
+    assert sorted((c.data["ingredient_id"], c.data["quantity"]) for c in published) == sorted(
+        [(egg, 1), (milk, 2), (flour, 3)]
+    )
+
+
+def test_missing_key_gets_404_without_failing_the_batch(fridge, commits):
+    user, (egg, milk, _) = fridge
+    coalescer = WriteCoalescer(window_ms=200)
+
+    results = _concurrently(coalescer, [(user, egg, 1), (user, 9999, 2), (user, milk, 3)])
+
+    assert results[0].quantity == 1
+    assert isinstance(results[1], HTTPException) and results[1].status_code == 404
+    assert results[2].quantity == 3
+    assert len(commits) == 1
+
+
+def test_failed_batch_falls_back_to_one_transaction_per_key(fridge, commits, monkeypatch):
+    user, (egg, milk, flour) = fridge
+    update_returning = coalescer_module.crud.update_user_ingredient_returning
+
+    def failing_for_milk(db, user_id, ingredient_id, values):
+        if ingredient_id == milk:
+            raise RuntimeError("constraint violated")
+        return update_returning(db, user_id, ingredient_id, values)
+
+    monkeypatch.setattr(coalescer_module.crud, "update_user_ingredient_returning", failing_for_milk)
+    coalescer = WriteCoalescer(window_ms=200)
+
+    results = _concurrently(coalescer, [(user, egg, 1), (user, milk, 2), (user, flour, 3)])
+
+    assert results[0].quantity == 1
+    assert isinstance(results[1], RuntimeError)
+    assert results[2].quantity == 3
+    # The shared transaction rolled back; egg and flour were then committed
+    # on their own.
+    assert len(commits) == 2